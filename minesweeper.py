@@ -1,5 +1,31 @@
 import itertools
 import random
+from collections import deque
+
+import numpy as np
+
+# Relative positions of the eight cells surrounding a cell
+_NEIGHBOR_OFFSETS = tuple(
+    (di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)
+)
+
+
+def _nearby_mines_all(board):
+    """
+    Returns a grid holding, for every cell of a boolean board,
+    the number of mines among its neighbors.
+    """
+    # The 3x3 sum is separable, so add the left and right neighbors within each row,
+    # then the rows above and below, and take off the cell itself
+    mines = board.astype(np.int8)
+    rows = mines.copy()
+    rows[:, 1:] += mines[:, :-1]
+    rows[:, :-1] += mines[:, 1:]
+    counts = rows.copy()
+    counts[1:] += rows[:-1]
+    counts[:-1] += rows[1:]
+    counts -= mines
+    return counts
 
 
 class Minesweeper():
@@ -12,23 +38,18 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = np.zeros((height, width), dtype=bool)
+
+        # Add mines randomly by sampling distinct flat indices in one pass,
+        # so placement does not slow down as the board fills up
+        idx = random.sample(range(height * width), mines)
+        self.board.flat[idx] = True
+        self.mines = set(divmod(k, width) for k in idx)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # The board never changes after this, so count nearby mines once for every cell
+        self._nearby_counts = _nearby_mines_all(self.board)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -41,7 +62,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i, j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -49,8 +70,7 @@ class Minesweeper():
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -59,23 +79,7 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self._nearby_counts[cell])
 
     def won(self):
         """
@@ -91,13 +95,18 @@ class Sentence():
     and a count of the number of those cells which are mines.
     """
 
+    __slots__ = ("cells", "count")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return hash((self.cells, self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -128,7 +137,7 @@ class Sentence():
         """
         # Remove cell if in sentence and update count given cell is a known mine
         if cell in self.cells:
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -138,7 +147,7 @@ class Sentence():
         """
         # Remove cell if in sentence
         if cell in self.cells:
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
 
 class MinesweeperAI():
     """
@@ -158,17 +167,59 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Safe cells which have not been played yet
+        self._safe_unplayed = set()
+
+        # Cells neither played nor known to be mines, kept as a list for random.choice
+        # together with each cell's position in it so removal is a swap and pop
+        self._remaining = [(i, j) for i in range(height) for j in range(width)]
+        self._remaining_pos = {cell: pos for pos, cell in enumerate(self._remaining)}
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # The list last assigned to self.knowledge, to tell whether callers have changed it since
+        self._listed = self.knowledge
+
+        # Same sentences as self.knowledge, hashed for constant time membership tests
+        self._known = set()
+
+        # In-bounds neighbors of every cell, computed once per board
+        self._neighbors = {
+            (i, j): [
+                (i + di, j + dj) for di, dj in _NEIGHBOR_OFFSETS
+                if 0 <= i + di < height and 0 <= j + dj < width
+            ]
+            for i in range(height) for j in range(width)
+        }
+
+        # Sentences of self.knowledge by a serial id that stays fixed while
+        # emptied or duplicate sentences are pruned from the list
+        self._sentences = {}
+        self._next_id = 0
+
+        # Id of each indexed sentence by the identity of the Sentence object
+        self._ids = {}
+
+        # Index from each cell to the ids of sentences containing it
+        self._cell_to_sents = {cell: set() for cell in self._neighbors}
+
+        # Ids of sentences that are new or have shrunk and still have to be checked for conclusions
+        self._pending = deque()
+
+        # Superset and subset pairs already combined during the current add_knowledge call,
+        # keyed by id and cells of both sentences so that a pair counts as new again
+        # once marking shrinks either side
+        self._tried_pairs = set()
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self._discard_remaining(cell)
+        self._update_sentences(cell, Sentence.mark_mine)
 
     def mark_safe(self, cell):
         """
@@ -176,8 +227,107 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
+        if cell not in self.moves_made:
+            self._safe_unplayed.add(cell)
+        self._update_sentences(cell, Sentence.mark_safe)
+
+    def _update_sentences(self, cell, mark):
+        """
+        Applies a Sentence marking method for cell to every sentence containing it.
+        Sentences left empty or equal to another known sentence are dropped,
+        the others are queued for checking again.
+        """
+        # Only sentences indexed under the cell can contain it
+        for sentence_id in self._cell_to_sents[cell]:
+            sentence = self._sentences[sentence_id]
+            # Rehash the sentence in self._known around the change
+            self._known.discard(sentence)
+            mark(sentence, cell)
+            if sentence.cells and sentence not in self._known:
+                self._known.add(sentence)
+                self._pending.append(sentence_id)
+            else:
+                self._drop_sentence(sentence_id)
+        self._cell_to_sents[cell].clear()
+
+    def _drop_sentence(self, sentence_id):
+        """
+        Removes a sentence, already taken out of self._known, from the index.
+        It disappears from self.knowledge when that is rebuilt at the end of add_knowledge.
+        """
+        sentence = self._sentences.pop(sentence_id)
+        del self._ids[id(sentence)]
+        for cell in sentence.cells:
+            self._cell_to_sents[cell].discard(sentence_id)
+
+    def _discard_remaining(self, cell):
+        """
+        Removes a cell from the candidates for random moves
+        by moving the last candidate into its place.
+        """
+        pos = self._remaining_pos.pop(cell, None)
+        if pos is None:
+            return
+        last = self._remaining.pop()
+        if last != cell:
+            self._remaining[pos] = last
+            self._remaining_pos[last] = pos
+
+    def _add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, registers each of its cells
+        in the cell to sentence index and queues it for checking.
+        Empty and already known sentences are ignored.
+        """
+        if not sentence.cells or sentence in self._known:
+            return
+        sentence_id = self._next_id
+        self._next_id += 1
+        self._sentences[sentence_id] = sentence
+        self._ids[id(sentence)] = sentence_id
+        self._known.add(sentence)
+        for cell in sentence.cells:
+            self._cell_to_sents[cell].add(sentence_id)
+        self._pending.append(sentence_id)
+
+    def _infer(self, superset_id, subset_id):
+        """
+        Adds the difference of two sentences to the knowledge base
+        using the subset method, unless the pair was already combined.
+        """
+        superset = self._sentences[superset_id]
+        subset = self._sentences[subset_id]
+        pair = (superset_id, superset.cells, subset_id, subset.cells)
+        if pair in self._tried_pairs:
+            return
+        self._tried_pairs.add(pair)
+
+        new_inference = Sentence(superset.cells - subset.cells, superset.count - subset.count)
+        self._add_sentence(new_inference)
+
+    def _sync_knowledge(self):
+        """
+        Brings the index in line with self.knowledge, indexing sentences
+        added to the list directly and dropping ones removed from it.
+        """
+        # Nothing to do while the list is the one built last and still matches the index
+        if self.knowledge is self._listed and len(self.knowledge) == len(self._sentences):
+            return
+
+        listed = {id(sentence) for sentence in self.knowledge}
+        for sentence_id, sentence in list(self._sentences.items()):
+            if id(sentence) not in listed:
+                self._known.discard(sentence)
+                self._drop_sentence(sentence_id)
+
         for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+            if id(sentence) not in self._ids:
+                # Apply what is already known before indexing the sentence
+                for known in sentence.cells & self.mines:
+                    sentence.mark_mine(known)
+                for known in sentence.cells & self.safes:
+                    sentence.mark_safe(known)
+                self._add_sentence(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -194,8 +344,13 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        # Index any sentences the knowledge list gained or lost outside of this class
+        self._sync_knowledge()
+
         # Append cell to moves made
         self.moves_made.add(cell)
+        self._safe_unplayed.discard(cell)
+        self._discard_remaining(cell)
 
         # Mark as safe cell
         self.mark_safe(cell)
@@ -204,56 +359,60 @@ class MinesweeperAI():
         undetermined_cells = []
 
         # Check if a cell is undetermined or if cell is a mine reduce count
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Continue loop if current cell
-                if (i, j) == cell:
-                    continue
-                # If a neighbor is a mine reduce count
-                elif (i, j) in self.mines:
-                    count -= 1
-                # Append undetermined cells
-                elif 0 <= i < self.height and 0 <= j < self.width and (i, j) not in self.safes and (i, j) not in self.moves_made:
-                    undetermined_cells.append((i, j))
+        for neighbor in self._neighbors[cell]:
+
+            # If a neighbor is a mine reduce count
+            if neighbor in self.mines:
+                count -= 1
+            # Append undetermined cells
+            elif neighbor not in self.safes and neighbor not in self.moves_made:
+                undetermined_cells.append(neighbor)
 
         # New sentence with undetermined cells and count 
         new_sentence = Sentence(undetermined_cells, count)
 
         # Add to new sentence to knowledge
-        self.knowledge.append(new_sentence)
-
-        # Check every sentence in the knowledge base
-        # If a sentence contains a cell which is not a previously made move, check wether the cell can be determined as safe or mine
-        for sentence in self.knowledge:
-            if sentence.known_safes():
-                for cell in sentence.known_safes().copy():
+        self._add_sentence(new_sentence)
+
+        # Work through new or shrunk sentences until nothing more can be concluded
+        while self._pending:
+            sentence_id = self._pending.popleft()
+            sentence = self._sentences.get(sentence_id)
+            if sentence is None:
+                continue
+
+            # Mark cells of a sentence that is entirely safe or entirely mines,
+            # marking pushes every sentence that shrinks back onto the worklist
+            # (marking replaces a sentence's frozenset of cells rather than changing it)
+            safes = sentence.known_safes()
+            if safes:
+                for cell in safes:
                     self.mark_safe(cell)
-            if sentence.known_mines():
-                for cell in sentence.known_mines().copy():
+                continue
+            mines = sentence.known_mines()
+            if mines:
+                for cell in mines:
                     self.mark_mine(cell)
-
-        # Check for possible inferences
-        while True:
-            new_inference_made = False
-
-            # Using subset method to check knowledge for possible inferences
-            for sentence in self.knowledge:
-                for possible_subset in self.knowledge:
-                    if possible_subset.cells.issubset(sentence.cells):
-                        if sentence.count != 0 and possible_subset.count != 0 and sentence != possible_subset:
-                            new_inference = Sentence(sentence.cells - possible_subset.cells, sentence.count - possible_subset.count)
-                            if new_inference not in self.knowledge:
-                                self.knowledge.append(new_inference)
-                                # Continue while loop in case of new possible inferences
-                                new_inference_made = True
-
-            # No inference made, exit while loop                 
-            if not new_inference_made:
-                break
-
-
-            
+                continue
+
+            # A superset has to be indexed under every cell of the sentence,
+            # a subset under at least one of them
+            buckets = [self._cell_to_sents[c] for c in sentence.cells]
+            for other_id in set.intersection(*buckets):
+                superset = self._sentences[other_id]
+                if superset.count != 0 and sentence.cells < superset.cells:
+                    self._infer(other_id, sentence_id)
+            for other_id in set.union(*buckets):
+                subset = self._sentences[other_id]
+                if subset.count != 0 and subset.cells < sentence.cells:
+                    self._infer(sentence_id, other_id)
+
+        # Prune sentences dropped as empty or duplicate from the knowledge base
+        self.knowledge = list(self._sentences.values())
+        self._listed = self.knowledge
+
+        # Pairs are only combined again within one pass over the worklist, so forget them
+        self._tried_pairs.clear()
 
     def make_safe_move(self):
         """
@@ -264,10 +423,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made:
-                return cell
-        return None
+        return next(iter(self._safe_unplayed), None)
 
 
                
@@ -279,13 +435,6 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        possible_moves = []
-        # Check the entire board pick a random move which hasn't been played nor a mine
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    possible_moves.append((i, j))
-
-        if len(possible_moves) > 0:
-            return random.choice(possible_moves)
+        if self._remaining:
+            return random.choice(self._remaining)
         else: return None
@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence, _nearby_mines_all
+
+
+def play(seed, height, width, mines):
+    """
+    Plays one seeded game with the AI until it hits a mine or runs out of moves,
+    checking after every move that it has concluded nothing false.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width)
+    while True:
+        move = ai.make_safe_move()
+        if move is not None:
+            assert not game.is_mine(move)
+        else:
+            move = ai.make_random_move()
+            if move is None:
+                return
+            assert move not in ai.moves_made and move not in ai.mines
+            if game.is_mine(move):
+                return
+        ai.add_knowledge(move, game.nearby_mines(move))
+        assert ai.mines <= game.mines
+        assert not ai.safes & game.mines
+        assert ai._safe_unplayed == ai.safes - ai.moves_made
+
+
+def test_fixed_boards_are_sound():
+    for seed in range(50):
+        play(seed, 8, 8, 8)
+    for seed in range(10):
+        play(seed, 16, 30, 99)
+    for seed in range(10):
+        play(seed, 1, 7, 2)
+
+
+def test_random_moves_skip_played_cells_and_mines():
+    # On a single row of five cells, (0, 1) becomes a known mine and (0, 3) a known safe
+    ai = MinesweeperAI(height=1, width=5)
+    ai.add_knowledge((0, 0), 1)
+    ai.add_knowledge((0, 4), 0)
+    assert ai.mines == {(0, 1)}
+    for _ in range(20):
+        assert ai.make_random_move() in {(0, 2), (0, 3)}
+
+    ai.add_knowledge((0, 2), 1)
+    assert ai.make_random_move() == (0, 3)
+    ai.add_knowledge((0, 3), 0)
+    assert ai.make_random_move() is None
+
+
+def test_nearby_mines_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for height, width in [(1, 1), (1, 6), (5, 1), (2, 2), (8, 8), (7, 13)]:
+        board = rng.random((height, width)) < 0.4
+        counts = _nearby_mines_all(board)
+        for i in range(height):
+            for j in range(width):
+                expected = sum(
+                    board[k, l]
+                    for k in range(i - 1, i + 2)
+                    for l in range(j - 1, j + 2)
+                    if (k, l) != (i, j) and 0 <= k < height and 0 <= l < width
+                )
+                assert counts[i, j] == expected
+
+
+def test_subset_inference_marks_safes_immediately():
+    # On a board of two rows and three columns, revealing (0, 0) with one nearby mine
+    # and then (0, 1) with one nearby mine gives {(1, 0), (1, 1)} = 1 and
+    # {(0, 2), (1, 0), (1, 1), (1, 2)} = 1, so the subset method infers {(0, 2), (1, 2)} = 0
+    ai = MinesweeperAI(height=2, width=3)
+    ai.add_knowledge((0, 0), 1)
+    ai.add_knowledge((0, 1), 1)
+
+    # The inferred sentence has to be concluded safe within the same call
+    assert {(0, 2), (1, 2)} <= ai.safes
+    assert ai.make_safe_move() in {(0, 2), (1, 2)}
+    assert not ai.mines
+
+
+def test_sentences_added_to_knowledge_directly_are_used():
+    ai = MinesweeperAI()
+    ai.knowledge.append(Sentence({(0, 1), (1, 0), (1, 1)}, 0))
+    ai.add_knowledge((3, 3), 0)
+
+    assert {(0, 1), (1, 0), (1, 1)} <= ai.safes
+    # Both sentences are empty once their cells are marked safe, so they are pruned
+    assert ai.knowledge == []